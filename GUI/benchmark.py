@@ -0,0 +1,300 @@
+"""Headless responsiveness benchmark for the desktop client.
+
+Runs ModernChatWindow on the offscreen Qt platform against generated
+datasets and reports frame times (p50/p90/p99/max, in ms) and peak RSS
+as JSON. Every dataset runs in its own process so peak RSS is per dataset.
+
+    python GUI/benchmark.py                              # 10k, 100k and 1M messages, 100k contacts
+    python GUI/benchmark.py --messages 10000 --contacts 5000 --output bench.json
+    python GUI/benchmark.py --baseline bench.json        # exit 1 if p90s regressed
+"""
+
+import os
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ.pop("CHAT_SERVER_URL", None)  # never connect to a server while benchmarking
+
+import sys
+import json
+import math
+import time
+import random
+import shutil
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+import importlib.util
+
+CLIENT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "client app.py")
+
+SYLLABLES = ["al", "ex", "an", "dra", "mar", "ia", "jo", "hn", "li", "sa",
+             "ben", "ton", "ka", "te", "ri", "na", "lo", "ve", "ed", "gar"]
+WORDS = ["hey", "ok", "sounds", "good", "see", "you", "tomorrow", "did", "the",
+         "build", "pass", "lunch", "later", "thanks", "sure", "why", "not", "meeting"]
+
+SEARCH_QUERIES = ["a", "al", "ale", "alex", "mar", "maria", "ton", "zzz"]
+
+
+def load_client():
+    spec = importlib.util.spec_from_file_location("client_app", CLIENT_PATH)
+    client = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(client)
+    return client
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+
+    def pick(p):  # nearest rank
+        return round(ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)], 3)
+
+    return {
+        "count": len(ordered),
+        "p50_ms": pick(50),
+        "p90_ms": pick(90),
+        "p99_ms": pick(99),
+        "max_ms": round(ordered[-1], 3),
+    }
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def generate_dataset(client, messages, contacts, rng):
+    """Fill chat.db in the current directory through the client's own store.
+
+    Half of the messages go to the first contact, so there is always one
+    very long conversation; the rest are spread over the next 100 contacts.
+    """
+    names = set()
+    while len(names) < contacts:
+        first = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+        last = "".join(rng.choice(SYLLABLES) for _ in range(3))
+        names.add(f"{first.title()} {last.title()}")
+    names = sorted(names)
+    rng.shuffle(names)
+
+    store = client.MessageStore(client.DB_FILE)
+    for name in names:
+        store.add_contact(name)
+
+    busy = names[1:101] or names[:1]
+    counts = {names[0]: messages // 2}
+    for i in range(messages - messages // 2):
+        counts[busy[i % len(busy)]] = counts.get(busy[i % len(busy)], 0) + 1
+
+    for name, count in counts.items():
+        for start in range(0, count, 10000):
+            batch = [client.Message(" ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 30))),
+                                    (start + i) % 3 == 0, "2025-01-01T12:00:00Z")
+                     for i in range(min(10000, count - start))]
+            store.append_messages(name, batch)
+    store.close()
+    return names
+
+
+def run_dataset(messages, contacts, iterations, seed):
+    rng = random.Random(seed)
+    workdir = tempfile.mkdtemp(prefix="chat-bench-")
+    os.chdir(workdir)  # the client keeps chat.db in the working directory
+
+    client = load_client()
+    from PyQt5.QtCore import QEvent
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication([])
+
+    start = time.perf_counter()
+    names = generate_dataset(client, messages, contacts, rng)
+    generate_s = time.perf_counter() - start
+
+    def frame(action, *args):
+        """Run one UI action plus the event processing it triggers, in ms."""
+        start = time.perf_counter()
+        action(*args)
+        app.processEvents()
+        return (time.perf_counter() - start) * 1000
+
+    def settle():
+        for _ in range(200):
+            app.processEvents()
+
+    results = {}
+
+    # Cold start: constructor (load_data included), show and first event pass
+    samples = []
+    window = None
+    for _ in range(iterations["cold_start"]):
+        if window:
+            # Don't let the old window's idle index build run during later frames
+            window.close()
+            window.deleteLater()
+            app.sendPostedEvents(None, QEvent.DeferredDelete)
+        start = time.perf_counter()
+        window = client.ModernChatWindow()
+        window.show()
+        app.processEvents()
+        samples.append((time.perf_counter() - start) * 1000)
+    results["cold_start"] = percentiles(samples)
+
+    def keystroke(text):
+        window.search_edit.setText(text)  # on_search_changed only restarts the debounce
+        window.run_search()
+
+    def type_queries(rounds):
+        samples = []
+        for _ in range(rounds):
+            for query in SEARCH_QUERIES:
+                for end in range(1, len(query) + 1):
+                    samples.append(frame(keystroke, query[:end]))
+                samples.append(frame(keystroke, ""))
+        return samples
+
+    # Search right after startup, while the idle index build has barely begun
+    results["search_cold"] = percentiles(type_queries(1))
+    settle()
+
+    proxy = window.contact_proxy
+    big = proxy.index(window.contacts.index(names[0]), 0)
+
+    # Contact switch: alternate the long conversation (an LRU hit after the
+    # first switch) with random others, most of which have no messages
+    samples = []
+    for i in range(iterations["switch"]):
+        target = big if i % 2 == 0 else proxy.index(rng.randrange(proxy.rowCount()), 0)
+        samples.append(frame(window.contact_list.setCurrentIndex, target))
+    results["contact_switch"] = percentiles(samples)
+
+    # Uncached open: empty the LRU before each switch, alternating the long
+    # conversation with the next busiest ones, so every switch reads the store
+    busy = [proxy.index(window.contacts.index(name), 0) for name in names[1:101]]
+    samples = []
+    for i in range(iterations["open_uncached"]):
+        target = big if i % 2 == 0 or not busy else busy[i // 2 % len(busy)]
+        window.messages.clear()
+        samples.append(frame(window.contact_list.setCurrentIndex, target))
+    results["open_uncached"] = percentiles(samples)
+
+    # Send: add_message on the long conversation, then the commit behind it
+    window.contact_list.setCurrentIndex(big)
+    settle()
+    samples = [frame(window.add_message, f"bench message {i}") for i in range(iterations["send"])]
+    results["send"] = percentiles(samples)
+    start = time.perf_counter()
+    window.store.flush()
+    results["send_commit"] = percentiles([(time.perf_counter() - start) * 1000])
+
+    # Scroll: page up through the long conversation, loading older history
+    window.scroll_to_bottom()
+    settle()
+    bar = window.message_view.verticalScrollBar()
+    samples = []
+    for _ in range(iterations["scroll"]):
+        samples.append(frame(bar.setValue, max(bar.minimum(), bar.value() - bar.pageStep())))
+    results["scroll"] = percentiles(samples)
+
+    # Search: time a full index build, let the window finish its own idle
+    # build, then type each query one key at a time
+    start = time.perf_counter()
+    client.ContactSearchIndex(window.contacts)
+    results["search_index_build"] = percentiles([(time.perf_counter() - start) * 1000])
+    while window.index_timer.isActive():
+        app.processEvents()
+    results["search"] = percentiles(type_queries(iterations["search_rounds"]))
+
+    window.close()
+    os.chdir(os.path.dirname(workdir))
+    shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        "messages": messages,
+        "contacts": contacts,
+        "generate_s": round(generate_s, 2),
+        "scenarios": results,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def regressions(results, baseline, tolerance):
+    """Scenarios whose p90 got more than ``tolerance`` slower than the baseline."""
+    before = {(r["messages"], r["contacts"]): r for r in baseline.get("results", [])}
+    found = []
+    for run in results:
+        old = before.get((run["messages"], run["contacts"]))
+        if not old:
+            continue
+        for name, stats in run["scenarios"].items():
+            old_stats = old["scenarios"].get(name)
+            # Ignore sub-millisecond noise
+            if old_stats and stats["p90_ms"] > max(old_stats["p90_ms"] * (1 + tolerance), 1.0):
+                found.append(f"{run['messages']} msgs / {run['contacts']} contacts: {name} "
+                             f"p90 {old_stats['p90_ms']} → {stats['p90_ms']} ms")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", default="10000,100000,1000000",
+                        help="comma-separated message counts, one dataset each")
+    parser.add_argument("--contacts", type=int, default=100000)
+    parser.add_argument("--switches", type=int, default=100)
+    parser.add_argument("--uncached-opens", type=int, default=50)
+    parser.add_argument("--sends", type=int, default=200)
+    parser.add_argument("--scrolls", type=int, default=200)
+    parser.add_argument("--cold-starts", type=int, default=3)
+    parser.add_argument("--search-rounds", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="earlier JSON report to compare p90s against")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed p90 slowdown vs. the baseline (0.25 = 25%%)")
+    parser.add_argument("--single", type=int, help=argparse.SUPPRESS)  # child process mode
+    args = parser.parse_args()
+
+    iterations = {
+        "cold_start": args.cold_starts,
+        "switch": args.switches,
+        "open_uncached": args.uncached_opens,
+        "send": args.sends,
+        "scroll": args.scrolls,
+        "search_rounds": args.search_rounds,
+    }
+
+    if args.single is not None:
+        json.dump(run_dataset(args.single, args.contacts, iterations, args.seed), sys.stdout)
+        return
+
+    results = []
+    for messages in (int(n) for n in args.messages.split(",")):
+        print(f"benchmarking {messages} messages / {args.contacts} contacts…", file=sys.stderr)
+        child = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--single", str(messages)] + sys.argv[1:],
+            stdout=subprocess.PIPE, check=True)
+        results.append(json.loads(child.stdout))
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "qpa": os.environ["QT_QPA_PLATFORM"],
+        "results": results,
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            found = regressions(results, json.load(f), args.tolerance)
+        for line in found:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if found:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,90 +1,944 @@
 import sys
 import json
 import os
+import asyncio
+import random
+import sqlite3
+import threading
+import queue
+import time
+from collections import deque, OrderedDict, defaultdict
+import aiohttp
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QLabel, QPushButton, QLineEdit, QListWidget, QListWidgetItem,
-    QFrame, QSizePolicy, QTextEdit, QScrollArea,
+    QLabel, QPushButton, QLineEdit,
+    QFrame, QTextEdit, QListView, QAbstractItemView, QStyledItemDelegate, QStyle,
     QDialog, QFormLayout, QDialogButtonBox, QMessageBox
 )
-from PyQt5.QtCore import Qt, QSize
-from PyQt5.QtGui import QFont, QColor, QPalette, QTextCharFormat, QBrush
+from PyQt5.QtCore import (
+    Qt, QSize, QRect, QRectF, QThread, QTimer, pyqtSignal,
+    QAbstractListModel, QModelIndex
+)
+from PyQt5.QtGui import QFont, QFontMetrics, QColor, QPalette, QPainter, QPainterPath
 
 # File paths for persistence
-CONTACTS_FILE = "contacts.json"
+DB_FILE = "chat.db"
+CONTACTS_FILE = "contacts.json"  # legacy JSON files, imported into DB_FILE once
 MESSAGES_FILE = "messages.json"
+WRITE_DEBOUNCE_S = 0.25     # writes arriving within this window share one commit
+FLUSH_TIMEOUT_S = 5.0       # longest the GUI thread waits for the writer
+WRITE_RETRIES = 3           # attempts at a batch while the database is locked
+
+# Chat server connection (leave CHAT_SERVER_URL unset to stay offline)
+SERVER_URL = os.environ.get("CHAT_SERVER_URL", "")
+CHAT_USER = os.environ.get("CHAT_USER", "John")
+CHAT_PASS = os.environ.get("CHAT_PASS", "default-insecure-123-change-me")
+ROOM_CONTACT = "Chat Room"  # the server's shared room shows up as a contact
+
+RECONNECT_MIN_DELAY = 1.0
+RECONNECT_MAX_DELAY = 30.0
+FRAME_INTERVAL_MS = 16      # incoming messages are applied at most once per frame
+MAX_BATCH_PER_FRAME = 500
+
+MESSAGE_PAGE_SIZE = 200     # messages read on open / per scroll-up
+MAX_SHOWN_MESSAGES = 600    # rows the message view holds; older or newer ones are dropped
+NEAR_BOTTOM_PX = 48         # new messages keep the view at the bottom within this distance
+MAX_CACHED_CONVERSATIONS = 8  # opened conversations kept in memory (LRU)
+
+SEARCH_DEBOUNCE_MS = 120    # search runs once typing pauses this long
+FUZZY_MIN_OVERLAP = 0.5     # share of query trigrams a fuzzy match must contain
+FUZZY_WHEN_FEWER_THAN = 20  # only look for fuzzy matches when exact ones are scarce
+INDEX_TICK_MS = 4           # time the search index build may take per tick...
+INDEX_INTERVAL_MS = 8       # ...leaving room between ticks for input
+INDEX_START_DELAY_MS = 500  # delay before the first tick
+
+HighlightRole = Qt.UserRole + 2
+
+
+class ContactSearchIndex:
+    """1- to 3-gram and prefix postings over lowercased contact names.
+
+    ``search`` answers substring queries from the shortest posting list
+    instead of scanning every name, and falls back to trigram overlap for
+    fuzzy matches when few names contain the query exactly. Names not
+    indexed yet can be passed to ``search`` to be scanned and ranked along.
+    """
+
+    def __init__(self, names=()):
+        self.names = []     # lowercased, indexed by source row
+        self.words = []     # " " + name with . _ - as spaces, to spot word starts
+        self.grams = defaultdict(list)     # n-gram → rows containing it, ascending
+        self.prefixes = defaultdict(list)  # first 1-3 chars of the name → rows
+        self.starts = defaultdict(list)    # first 1-3 chars of any word → rows
+        self._last = ("", None)  # previous query and its exact matches
+        for name in names:
+            self.add(name)
+
+    def __len__(self):
+        return len(self.names)
+
+    @staticmethod
+    def _words(low):
+        return " " + low.replace(".", " ").replace("_", " ").replace("-", " ")
+
+    def add(self, name):
+        row = len(self.names)
+        low = name.lower()
+        words = self._words(low)
+        self.names.append(low)
+        self.words.append(words)
+
+        grams = self.grams
+        size = len(low)
+        for gram in {low[i:i + n] for n in (1, 2, 3) for i in range(size - n + 1)}:
+            grams[gram].append(row)
+        prefixes = self.prefixes
+        for n in range(1, min(size, 3) + 1):
+            prefixes[low[:n]].append(row)
+        starts = self.starts
+        for start in {word[:n] for word in words.split(" ") for n in range(1, min(len(word), 3) + 1)}:
+            starts[start].append(row)
+        self._last = ("", None)
+
+    def search(self, query, pending=()):
+        """Matching rows, best first: prefix, word start, substring, then fuzzy.
+
+        ``pending`` are the names of the rows after the indexed ones; they
+        are scanned directly (fuzzy matching only covers indexed rows).
+        """
+        q = query.lower()
+        word_start = self._words(q)  # normalised like self.words
+        names, words = self.names, self.words
+        last_query, last_rows = self._last
+        if len(q) <= 3:
+            exact = self.grams.get(q, [])
+        else:
+            if last_rows is not None and q.startswith(last_query):
+                candidates = last_rows  # typing more only narrows the previous result
+            else:
+                postings = [self.grams.get(q[i:i + 3], ()) for i in range(len(q) - 2)]
+                candidates = min(postings, key=len)
+            exact = [row for row in candidates if q in names[row]]
+        if len(q) <= 3 and " " not in word_start[1:]:
+            # The posting lists are the answer; prefix ⊆ at_word ⊆ exact
+            at_word = self.starts.get(q, [])
+            prefix = self.prefixes.get(q, [])
+        else:
+            at_word = [row for row in exact if word_start in words[row]]
+            prefix = [row for row in at_word if names[row].startswith(q)]
+        self._last = (q, exact)
 
-class ContactItem(QListWidgetItem):
-    def __init__(self, name, parent=None):
+        if len(prefix) == len(at_word):
+            word = []
+        else:
+            first = set(prefix)
+            word = [row for row in at_word if row not in first]
+        if len(at_word) == len(exact):
+            inner = []
+        else:
+            seen = set(at_word)
+            inner = [row for row in exact if row not in seen]
+        if pending:
+            prefix, word, inner = list(prefix), list(word), list(inner)  # may be posting lists
+            space_start = " " + q
+            plain = word_start == space_start  # the query has no . _ -
+            for row, low in enumerate(map(str.lower, pending), len(names)):
+                if q not in low:
+                    continue
+                if low.startswith(q):
+                    prefix.append(row)
+                elif space_start in low:
+                    word.append(row)
+                elif (not plain or "." in low or "_" in low or "-" in low) and word_start in self._words(low):
+                    word.append(row)
+                else:
+                    inner.append(row)
+        ranked = prefix + word + inner
+
+        if len(ranked) < FUZZY_WHEN_FEWER_THAN and len(q) >= 3:
+            ranked += self._fuzzy(q, set(exact))
+        return ranked
+
+    def _fuzzy(self, q, exclude):
+        trigrams = {q[i:i + 3] for i in range(len(q) - 2)}
+        hits = {}
+        for gram in trigrams:
+            for row in self.grams.get(gram, ()):
+                hits[row] = hits.get(row, 0) + 1
+        needed = max(1, int(len(trigrams) * FUZZY_MIN_OVERLAP + 0.5))
+        rows = [row for row, count in hits.items() if count >= needed and row not in exclude]
+        rows.sort(key=lambda row: (-hits[row], row))
+        return rows
+
+    @staticmethod
+    def highlight_spans(name, query):
+        """(start, length) runs of ``name`` to highlight for ``query``."""
+        low, q = name.lower(), query.lower()
+        if not q:
+            return []
+        pos = low.find(q)
+        if pos != -1:
+            spans = []
+            while pos != -1:
+                spans.append((pos, len(q)))
+                pos = low.find(q, pos + len(q))
+            return spans
+
+        marked = [False] * len(low)
+        for i in range(len(q) - 2):
+            pos = low.find(q[i:i + 3])
+            while pos != -1:
+                marked[pos:pos + 3] = [True] * 3
+                pos = low.find(q[i:i + 3], pos + 1)
+        spans = []
+        for i, on in enumerate(marked):
+            if on and (i == 0 or not marked[i - 1]):
+                spans.append([i, 0])
+            if on:
+                spans[-1][1] += 1
+        return [tuple(span) for span in spans]
+
+
+class ContactListModel(QAbstractListModel):
+    """The contact names, with their summaries as tooltips."""
+
+    def __init__(self, contacts, summaries, parent=None):
         super().__init__(parent)
-        self.original_name = name
-        self.setText(f"  •  {name}")
-        self.setSizeHint(QSize(0, 52))
-
-    def set_highlight(self, search_text):
-        if not search_text:
-            self.setText(f"  •  {self.original_name}")
-            return
+        self.contacts = contacts    # shared with ModernChatWindow
+        self.summaries = summaries
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.contacts)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        name = self.contacts[index.row()]
+        if role == Qt.DisplayRole:
+            return name
+        if role == Qt.ToolTipRole:
+            count, last_text = self.summaries.get(name, (0, ""))
+            return f"{last_text}\n{count} messages" if count else None
+        return None
+
+    def reset(self):
+        self.beginResetModel()
+        self.endResetModel()
+
+    def append(self, name):
+        row = len(self.contacts)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.contacts.append(name)
+        self.endInsertRows()
+
+
+class ContactFilterProxy(QAbstractListModel):
+    """Filtered, ranked view of a ContactListModel, in the role of a QSortFilterProxyModel.
+
+    QSortFilterProxyModel would call filterAcceptsRow() and lessThan() in
+    Python for every contact on each keystroke. Here the ranked rows come
+    from ContactSearchIndex, and Qt only sees one model reset.
+    """
+
+    def __init__(self, source, parent=None):
+        super().__init__(parent)
+        self.source = source
+        self.query = ""
+        self.rows = None       # source rows in display order; None shows everything
+        source.modelAboutToBeReset.connect(self.beginResetModel)
+        source.modelReset.connect(self._source_reset)
+        source.rowsAboutToBeInserted.connect(self._source_rows_about_to_be_inserted)
+        source.rowsInserted.connect(self._source_rows_inserted)
+
+    def set_filter(self, query, rows):
+        self.beginResetModel()
+        self.query = query
+        self.rows = rows if query else None
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.source.contacts) if self.rows is None else len(self.rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == HighlightRole:
+            return ContactSearchIndex.highlight_spans(index.data(Qt.DisplayRole), self.query)
+        return self.source.data(self.mapToSource(index), role)
+
+    def mapToSource(self, proxy_index):
+        if not proxy_index.isValid():
+            return QModelIndex()
+        row = proxy_index.row()
+        if self.rows is not None:
+            row = self.rows[row]
+        return self.source.index(row, 0)
+
+    def mapFromSource(self, source_index):
+        if not source_index.isValid():
+            return QModelIndex()
+        if self.rows is None:
+            return self.index(source_index.row(), 0)
+        try:
+            return self.index(self.rows.index(source_index.row()), 0)
+        except ValueError:
+            return QModelIndex()
+
+    def _source_reset(self):
+        self.query = ""
+        self.rows = None
+        self.endResetModel()
+
+    def _source_rows_about_to_be_inserted(self, parent, first, last):
+        if self.rows is None:
+            self.beginInsertRows(QModelIndex(), first, last)
+
+    def _source_rows_inserted(self, parent, first, last):
+        if self.rows is None:
+            self.endInsertRows()
+
+
+class ContactDelegate(QStyledItemDelegate):
+    """Contact row with the search match drawn in bold blue."""
+
+    def __init__(self, view):
+        super().__init__(view)
+        self.view = view
+
+    def sizeHint(self, option, index):
+        return QSize(self.view.viewport().width(), 52)
+
+    def paint(self, painter, option, index):
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        rect = QRectF(option.rect).adjusted(0, 1, 0, -1)
+
+        if option.state & QStyle.State_Selected:
+            background, color = QColor("#1f6feb"), QColor("white")
+        elif option.state & QStyle.State_MouseOver:
+            background, color = QColor("#21262d"), QColor("#c9d1d9")
+        else:
+            background, color = QColor("#161b22"), QColor("#c9d1d9")
+        path = QPainterPath()
+        path.addRoundedRect(rect, 8, 8)
+        painter.fillPath(path, background)
+
+        name = index.data(Qt.DisplayRole)
+        spans = index.data(HighlightRole) or []
+        normal = QFont(option.font)
+        bold = QFont(option.font)
+        bold.setBold(True)
+
+        x = rect.left() + 14
+        baseline = rect.center().y() + option.fontMetrics.ascent() / 2 - 1
+        painter.setClipRect(rect.adjusted(0, 0, -14, 0))
+        pieces = [("  •  ", False)]
+        pos = 0
+        for start, length in spans:
+            pieces.append((name[pos:start], False))
+            pieces.append((name[start:start + length], True))
+            pos = start + length
+        pieces.append((name[pos:], False))
+
+        for text, highlighted in pieces:
+            if not text:
+                continue
+            font = bold if highlighted else normal
+            painter.setFont(font)
+            if highlighted and not option.state & QStyle.State_Selected:
+                painter.setPen(QColor("#58a6ff"))
+            else:
+                painter.setPen(color)
+            painter.drawText(int(x), int(baseline), text)
+            x += QFontMetrics(font).horizontalAdvance(text)
+        painter.restore()
 
-        text = self.original_name.lower()
-        search = search_text.lower()
-        if search not in text:
-            self.setHidden(True)
-            return
 
-        self.setHidden(False)
-        new_text = "  •  "
-        pos = 0
-        fmt_normal = QTextCharFormat()
-        fmt_highlight = QTextCharFormat()
-        fmt_highlight.setFontWeight(QFont.Bold)
-        fmt_highlight.setForeground(QBrush(QColor("#58a6ff")))
+class Message:
+    __slots__ = ("text", "is_sent", "timestamp", "msg_id", "layout")
 
+    def __init__(self, text, is_sent, timestamp=None, msg_id=None):
+        self.text = text
+        self.is_sent = is_sent
+        self.timestamp = timestamp or "just now"  # you can use datetime later
+        self.msg_id = msg_id  # server id, only set for room messages
+        self.layout = None  # (wrap width, text rect), cached by MessageDelegate
+
+
+class Conversation:
+    """The loaded tail of one conversation.
+
+    ``messages`` holds the newest messages, oldest first. It grows a page
+    at a time towards older history, reading rows below ``first_id`` (the
+    store row id of ``messages[0]``) until ``complete``.
+    """
+    __slots__ = ("contact", "messages", "first_id", "complete")
+
+    def __init__(self, contact=None, messages=None, first_id=None, complete=True):
+        self.contact = contact
+        self.messages = messages if messages is not None else []
+        self.first_id = first_id
+        self.complete = complete
+
+
+class MessageStore:
+    """SQLite storage for contacts and messages.
+
+    Reads run on the caller's thread. Writes are queued and applied by a
+    background thread, which waits ``WRITE_DEBOUNCE_S`` after the first
+    queued write and commits everything that arrived meanwhile in a single
+    transaction. Each send is one appended row, independent of history size.
+    A batch that hits a locked database is retried; one that fails for
+    any other reason is re-applied op by op, so only the failing ops are
+    lost. Errors are handed to the next ``flush``.
+
+    The contacts table doubles as a small index: it keeps each contact's
+    message count and last message, so startup never touches the messages.
+    """
+
+    def __init__(self, path=DB_FILE):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        with self.db:
+            self.db.execute("""CREATE TABLE IF NOT EXISTS contacts (
+                name TEXT PRIMARY KEY,
+                position INTEGER NOT NULL,
+                message_count INTEGER NOT NULL DEFAULT 0,
+                last_text TEXT NOT NULL DEFAULT '')""")
+            self.db.execute("""CREATE TABLE IF NOT EXISTS messages (
+                id INTEGER PRIMARY KEY,
+                contact TEXT NOT NULL,
+                text TEXT NOT NULL,
+                is_sent INTEGER NOT NULL,
+                timestamp TEXT,
+                msg_id TEXT)""")
+            self.db.execute("CREATE INDEX IF NOT EXISTS contacts_by_position ON contacts (position)")
+            self.db.execute("CREATE INDEX IF NOT EXISTS messages_by_contact ON messages (contact, id)")
+            self.db.execute("CREATE INDEX IF NOT EXISTS messages_by_msg_id ON messages (msg_id) WHERE msg_id IS NOT NULL")
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._pending = 0  # queued ops not yet committed
+        self._error = None  # first error since the last flush
+        self._writer = threading.Thread(target=self._write_loop, name="MessageStore", daemon=True)
+        self._writer.start()
+
+    def is_empty(self):
+        return self.db.execute("SELECT 1 FROM contacts UNION ALL SELECT 1 FROM messages LIMIT 1").fetchone() is None
+
+    def load_summaries(self):
+        """(name, message_count, last_text) for every contact, in list order."""
+        return self.db.execute("SELECT name, message_count, last_text FROM contacts ORDER BY position").fetchall()
+
+    def load_summary(self, contact):
+        row = self.db.execute("SELECT message_count, last_text FROM contacts WHERE name = ?", (contact,)).fetchone()
+        return row or (0, "")
+
+    def load_messages(self, contact, before=None, limit=MESSAGE_PAGE_SIZE):
+        """The newest ``limit`` messages of ``contact`` below row id ``before``, oldest first.
+
+        Keyset paging on messages_by_contact, so a page costs the same
+        however long the conversation is. Also returns the row id of the
+        first message, to pass as ``before`` for the next page.
+        """
+        if before is None:
+            rows = self.db.execute("SELECT id, text, is_sent, timestamp, msg_id FROM messages "
+                                   "WHERE contact = ? ORDER BY id DESC LIMIT ?", (contact, limit)).fetchall()
+        else:
+            rows = self.db.execute("SELECT id, text, is_sent, timestamp, msg_id FROM messages "
+                                   "WHERE contact = ? AND id < ? ORDER BY id DESC LIMIT ?",
+                                   (contact, before, limit)).fetchall()
+        rows.reverse()
+        msgs = [Message(text, bool(is_sent), timestamp, msg_id) for _, text, is_sent, timestamp, msg_id in rows]
+        return msgs, (rows[0][0] if rows else None)
+
+    def last_msg_id(self, contact):
+        row = self.db.execute("SELECT msg_id FROM messages WHERE contact = ? AND msg_id IS NOT NULL "
+                              "ORDER BY id DESC LIMIT 1", (contact,)).fetchone()
+        return row[0] if row else None
+
+    def has_msg_id(self, msg_id):
+        return self.db.execute("SELECT 1 FROM messages WHERE msg_id = ? LIMIT 1", (msg_id,)).fetchone() is not None
+
+    def add_contact(self, name, first=False):
+        self._put(("add_contact", name, first))
+
+    def append_messages(self, contact, msgs):
+        if msgs:
+            self._put(("append", contact, [(m.text, m.is_sent, m.timestamp, m.msg_id) for m in msgs]))
+
+    def import_legacy(self, contacts, conversations):
+        """Add ``contacts`` and ``{contact: [Message]}`` in one op, so it lands whole or not at all."""
+        self._put(("import", contacts, {contact: [(m.text, m.is_sent, m.timestamp, m.msg_id) for m in msgs]
+                                        for contact, msgs in conversations.items()}))
+
+    def set_msg_id(self, contact, text, msg_id):
+        self._put(("set_msg_id", contact, text, msg_id))
+
+    def delete_messages(self, contact, msg_id_prefix):
+        self._put(("delete", contact, msg_id_prefix))
+
+    def clear_messages(self, contact):
+        self._put(("clear", contact))
+
+    def flush(self, timeout=FLUSH_TIMEOUT_S):
+        """Wait until every write queued so far is committed.
+
+        Returns None on success, or the error of a batch that failed since
+        the last flush. Gives up with a TimeoutError after ``timeout`` seconds.
+        """
+        with self._lock:
+            pending = self._pending
+        if pending:
+            done = threading.Event()
+            self._queue.put(("flush", done))
+            if not done.wait(timeout):
+                return TimeoutError(f"writes still pending after {timeout:.0f}s")
+        with self._lock:
+            error, self._error = self._error, None
+        return error
+
+    def _put(self, op):
+        with self._lock:
+            self._pending += 1
+        self._queue.put(op)
+
+    def close(self):
+        error = self.flush()
+        self._queue.put(None)
+        self._writer.join(FLUSH_TIMEOUT_S)
+        self.db.close()
+        return error
+
+    def _write_loop(self):
+        db = sqlite3.connect(self.path)
         while True:
-            start = text.find(search, pos)
-            if start == -1:
-                new_text += self.original_name
+            # Collect writes for up to WRITE_DEBOUNCE_S; a flush or close commits right away
+            ops = [self._queue.get()]
+            deadline = time.monotonic() + WRITE_DEBOUNCE_S
+            while ops[-1] is not None and ops[-1][0] != "flush":
+                try:
+                    ops.append(self._queue.get(timeout=max(0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            while True:
+                try:
+                    ops.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            waiters = [op[1] for op in ops if op is not None and op[0] == "flush"]
+            writes = [op for op in ops if op is not None and op[0] != "flush"]
+            stop = None in ops
+            error = self._commit(db, writes)
+            with self._lock:
+                self._pending -= len(writes)
+                if error and not self._error:
+                    self._error = error
+            for done in waiters:
+                done.set()
+            if stop:
+                db.close()
+                return
+
+    def _commit(self, db, writes):
+        """Apply ``writes``, in one transaction if possible; returns the first error or None."""
+        for attempt in range(WRITE_RETRIES):
+            try:
+                with db:  # rolled back on error
+                    for op in writes:
+                        self._apply(db, op)
+                return None
+            except sqlite3.OperationalError as e:
+                error = e
+                if "locked" not in str(e) and "busy" not in str(e):
+                    break
+                time.sleep(WRITE_DEBOUNCE_S * (attempt + 1))
+            except Exception as e:
+                error = e
                 break
-            pos = start + len(search)
+        else:
+            return error  # still locked: drop the batch rather than stall the queue
+
+        # One bad op shouldn't take the rest of the batch down with it
+        try:
+            with db:
+                db.execute("BEGIN")
+                for op in writes:
+                    db.execute("SAVEPOINT op")
+                    try:
+                        self._apply(db, op)
+                    except Exception:
+                        db.execute("ROLLBACK TO op")
+                    db.execute("RELEASE op")
+        except Exception as e:
+            return e
+        return error
+
+    @staticmethod
+    def _refresh_summary(db, contact):
+        db.execute("""UPDATE contacts SET
+            message_count = (SELECT COUNT(*) FROM messages WHERE contact = :c),
+            last_text = COALESCE((SELECT text FROM messages WHERE contact = :c ORDER BY id DESC LIMIT 1), '')
+            WHERE name = :c""", {"c": contact})
+
+    @classmethod
+    def _apply(cls, db, op):
+        kind = op[0]
+        if kind == "add_contact":
+            _, name, first = op
+            pick = "MIN(position) - 1" if first else "MAX(position) + 1"
+            db.execute(f"INSERT OR IGNORE INTO contacts (name, position) "
+                       f"VALUES (?, (SELECT COALESCE({pick}, 0) FROM contacts))", (name,))
+        elif kind == "append":
+            _, contact, rows = op
+            db.executemany("INSERT INTO messages (contact, text, is_sent, timestamp, msg_id) VALUES (?, ?, ?, ?, ?)",
+                           [(contact, *row) for row in rows])
+            db.execute("UPDATE contacts SET message_count = message_count + ?, last_text = ? WHERE name = ?",
+                       (len(rows), rows[-1][0], contact))
+        elif kind == "import":
+            _, contacts, conversations = op
+            for name in contacts:
+                cls._apply(db, ("add_contact", name, False))
+            for contact, rows in conversations.items():
+                if rows:
+                    cls._apply(db, ("append", contact, rows))
+        elif kind == "set_msg_id":
+            # Newest match: older rows without an id may predate acks
+            _, contact, text, msg_id = op
+            db.execute("UPDATE messages SET msg_id = ? WHERE id = (SELECT MAX(id) FROM messages "
+                       "WHERE contact = ? AND is_sent = 1 AND msg_id IS NULL AND text = ?)",
+                       (msg_id, contact, text))
+        elif kind == "delete":
+            _, contact, prefix = op
+            db.execute("DELETE FROM messages WHERE contact = ? AND substr(msg_id, 1, ?) = ?",
+                       (contact, len(prefix), prefix))
+            cls._refresh_summary(db, contact)
+        elif kind == "clear":
+            db.execute("DELETE FROM messages WHERE contact = ?", (op[1],))
+            db.execute("UPDATE contacts SET message_count = 0, last_text = '' WHERE name = ?", (op[1],))
+
+
+class ChatTransport(QThread):
+    """WebSocket connection to the chat server, running its own asyncio loop.
+
+    Incoming payloads are queued in ``incoming`` and announced with a single
+    ``messages_pending`` signal per batch; the GUI drains the queue on its
+    next frame tick instead of handling one signal per message.
+    """
+
+    messages_pending = pyqtSignal()
+    status_changed = pyqtSignal(str)
+
+    def __init__(self, url, username, password, last_seen=None, parent=None):
+        super().__init__(parent)
+        self.url = url
+        self.username = username
+        self.password = password
+        self.last_seen = last_seen  # msg_id of the newest message we have
+
+        self.incoming = deque()
+        self.outgoing = deque()
+        self._pending = False
+        self._running = True
+        self._loop = asyncio.new_event_loop()
+        self._task = None
+        self._wakeup = None
+
+    @staticmethod
+    def is_command(text):
+        """True for the lines main.py handles as commands rather than chat messages."""
+        return text in ("/users", "/clear_chat") or text.startswith(("/delete ", "AUTH ADMIN "))
+
+    def send(self, text):
+        # Called from the GUI thread; queued until a connection is available
+        self.outgoing.append(text)
+        self._call_in_loop(self._wake)
+
+    def stop(self):
+        self._running = False
+        self._call_in_loop(self._cancel)
+        self.wait()
+
+    def take_batch(self, limit):
+        self._pending = False
+        batch = []
+        while self.incoming and len(batch) < limit:
+            batch.append(self.incoming.popleft())
+        return batch
+
+    def run(self):
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._task = self._loop.create_task(self._run())
+            self._loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._loop.close()
+
+    def _call_in_loop(self, callback):
+        try:
+            self._loop.call_soon_threadsafe(callback)
+        except RuntimeError:
+            pass  # loop already closed
+
+    def _wake(self):
+        if self._wakeup:
+            self._wakeup.set()
+
+    def _cancel(self):
+        if self._task:
+            self._task.cancel()
+
+    def _deliver(self, payload):
+        self.incoming.append(payload)
+        if not self._pending:
+            self._pending = True
+            self.messages_pending.emit()
+
+    async def _run(self):
+        self._wakeup = asyncio.Event()
+        auth = aiohttp.BasicAuth(self.username, self.password)
+        delay = RECONNECT_MIN_DELAY
+
+        async with aiohttp.ClientSession(auth=auth) as session:
+            while self._running:
+                self.status_changed.emit("Connecting…")
+                params = {"since": self.last_seen} if self.last_seen else None
+                try:
+                    async with session.ws_connect(self.url, params=params, heartbeat=20.0) as ws:
+                        if await self._pump(ws):
+                            delay = RECONNECT_MIN_DELAY
+                except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+                    self.status_changed.emit(f"Connection error: {e}")
+
+                if not self._running:
+                    break
+                self.status_changed.emit(f"Disconnected – retrying in {delay:.0f}s")
+                await asyncio.sleep(delay * random.uniform(1.0, 1.5))
+                delay = min(delay * 2, RECONNECT_MAX_DELAY)
+
+    async def _pump(self, ws):
+        """Relay one connection until it closes; True if the login succeeded."""
+        welcomed = False
+        sender = asyncio.ensure_future(self._send_loop(ws))
+        try:
+            async for msg in ws:
+                if msg.type != aiohttp.WSMsgType.TEXT:
+                    continue
+                try:
+                    payload = json.loads(msg.data)
+                except ValueError:
+                    continue
+
+                if payload.get("type") == "system":
+                    content = payload.get("content", "")
+                    if content.startswith("Welcome"):
+                        welcomed = True
+                        self.status_changed.emit("Connected")
+                    elif content.startswith(("Login failed", "Username already taken")):
+                        self._running = False  # retrying would get the same answer
+                elif payload.get("type") in ("message", "ack") and payload.get("msg_id"):
+                    self.last_seen = payload["msg_id"]
+                self._deliver(payload)
+        finally:
+            sender.cancel()
+            await asyncio.gather(sender, return_exceptions=True)
+        return welcomed
+
+    async def _send_loop(self, ws):
+        while True:
+            while self.outgoing:
+                await ws.send_str(self.outgoing[0])
+                self.outgoing.popleft()
+            self._wakeup.clear()
+            if not self.outgoing:
+                await self._wakeup.wait()
 
-        self.setText(new_text)
 
+MessageRole = Qt.UserRole + 1
 
-class Message:
-    def __init__(self, text, is_sent, timestamp=None):
-        self.text = text
-        self.is_sent = is_sent
-        self.timestamp = timestamp or "just now"  # you can use datetime later
 
+class MessageListModel(QAbstractListModel):
+    """Window of at most ``MAX_SHOWN_MESSAGES`` rows onto a conversation.
+
+    A conversation opens on its last ``MESSAGE_PAGE_SIZE`` loaded messages.
+    ``load_older`` prepends a page when the user scrolls to the top, reading
+    it from the store once the loaded ones run out, and ``load_newer``
+    appends one at the bottom; whichever end is furthest away is dropped,
+    so the view never lays out more than the window. The model shares the
+    Conversation with ``ModernChatWindow.messages``, so appends must go
+    through ``append_messages``.
+    """
 
-class MessageWidget(QWidget):
-    def __init__(self, msg: Message, parent=None):
+    def __init__(self, store, parent=None):
         super().__init__(parent)
-        layout = QHBoxLayout(self)
-        layout.setContentsMargins(16, 6, 16, 6)
-        layout.setSpacing(0)
-
-        bubble = QLabel(msg.text)
-        bubble.setWordWrap(True)
-        bubble.setStyleSheet(f"""
-            QLabel {{
-                background: {'#2b5278' if msg.is_sent else '#3a3f44'};
-                color: {'#f0f6fc' if msg.is_sent else '#d1d5db'};
-                padding: 10px 16px;
-                border-radius: 18px;
-                border-top-right-radius: {'18px' if msg.is_sent else '4px'};
-                border-top-left-radius: {'4px' if msg.is_sent else '18px'};
-                max-width: 66%;
-            }}
-        """)
-        bubble.setSizePolicy(QSizePolicy.Maximum, QSizePolicy.Preferred)
+        self.store = store
+        self.conversation = Conversation()
+        self.start = 0  # messages[start:end] are the rows of the view
+        self.end = 0
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self.end - self.start
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        msg = self.conversation.messages[self.start + index.row()]
+        if role == MessageRole:
+            return msg
+        if role == Qt.DisplayRole:
+            return msg.text
+        return None
+
+    def set_conversation(self, conversation):
+        self.beginResetModel()
+        self.conversation = conversation
+        self.end = len(conversation.messages)
+        self.start = max(0, self.end - MESSAGE_PAGE_SIZE)
+        self.endResetModel()
+
+    def show_latest(self):
+        if not self.at_end():
+            self.set_conversation(self.conversation)
+
+    def has_older(self):
+        return self.start > 0 or not self.conversation.complete
+
+    def at_end(self):
+        return self.end == len(self.conversation.messages)
+
+    def load_older(self):
+        """Prepend up to a page of rows; returns how many."""
+        conv = self.conversation
+        if not self.start and not conv.complete:
+            older, first_id = self.store.load_messages(conv.contact, before=conv.first_id)
+            conv.complete = len(older) < MESSAGE_PAGE_SIZE
+            if older:
+                conv.messages[:0] = older
+                conv.first_id = first_id
+                self.start += len(older)
+                self.end += len(older)
+        count = min(MESSAGE_PAGE_SIZE, self.start)
+        if count:
+            self.beginInsertRows(QModelIndex(), 0, count - 1)
+            self.start -= count
+            self.endInsertRows()
+            self._drop_rows(at_top=False)
+        return count
+
+    def load_newer(self):
+        """Append up to a page of loaded rows; returns (added, dropped from the top)."""
+        count = min(MESSAGE_PAGE_SIZE, len(self.conversation.messages) - self.end)
+        if not count:
+            return 0, 0
+        first = self.rowCount()
+        self.beginInsertRows(QModelIndex(), first, first + count - 1)
+        self.end += count
+        self.endInsertRows()
+        return count, self._drop_rows(at_top=True)
+
+    def append_messages(self, msgs, follow=True):
+        """Add ``msgs`` to the conversation; they become rows only if ``follow``
+        and the window already reaches the end, otherwise ``load_newer`` shows them."""
+        if not msgs:
+            return
+        if not follow or not self.at_end():
+            self.conversation.messages.extend(msgs)
+            return
+        first = self.rowCount()
+        self.beginInsertRows(QModelIndex(), first, first + len(msgs) - 1)
+        self.conversation.messages.extend(msgs)
+        self.end += len(msgs)
+        self.endInsertRows()
+        self._drop_rows(at_top=True)
+
+    def _drop_rows(self, at_top):
+        extra = self.rowCount() - MAX_SHOWN_MESSAGES
+        if extra <= 0:
+            return 0
+        if at_top:
+            self.beginRemoveRows(QModelIndex(), 0, extra - 1)
+            self.start += extra
+        else:
+            self.beginRemoveRows(QModelIndex(), self.rowCount() - extra, self.rowCount() - 1)
+            self.end -= extra
+        self.endRemoveRows()
+        return extra
+
+
+class MessageDelegate(QStyledItemDelegate):
+    """Paints chat bubbles directly instead of creating a widget per message."""
+
+    MARGIN_H, MARGIN_V = 16, 6
+    PAD_H, PAD_V = 16, 10
+    RADIUS, TAIL_RADIUS = 18, 4
+
+    def __init__(self, view):
+        super().__init__(view)
+        self.view = view
+
+    def _text_rect(self, option, msg):
+        # The view re-measures every row whenever one is added; measure each message once per width
+        max_w = max(int(self.view.viewport().width() * 0.66) - 2 * self.PAD_H, 40)
+        if msg.layout is None or msg.layout[0] != max_w:
+            msg.layout = (max_w, option.fontMetrics.boundingRect(QRect(0, 0, max_w, 100000),
+                                                                 Qt.TextWordWrap, msg.text))
+        return msg.layout[1]
+
+    def sizeHint(self, option, index):
+        text_rect = self._text_rect(option, index.data(MessageRole))
+        return QSize(self.view.viewport().width(),
+                     text_rect.height() + 2 * (self.PAD_V + self.MARGIN_V))
+
+    def paint(self, painter, option, index):
+        msg = index.data(MessageRole)
+        text_rect = self._text_rect(option, msg)
+        bubble_w = text_rect.width() + 2 * self.PAD_H
+        bubble_h = text_rect.height() + 2 * self.PAD_V
+        row = option.rect
+        if msg.is_sent:
+            x = row.right() - self.MARGIN_H - bubble_w
+        else:
+            x = row.left() + self.MARGIN_H
+        bubble = QRectF(x, row.top() + self.MARGIN_V, bubble_w, bubble_h)
 
+        big = min(self.RADIUS, bubble_h / 2)
+        tail = min(self.TAIL_RADIUS, big)
         if msg.is_sent:
-            layout.addStretch()
-            layout.addWidget(bubble)
+            path = self._bubble_path(bubble, tail, big, big, big)
         else:
-            layout.addWidget(bubble)
-            layout.addStretch()
+            path = self._bubble_path(bubble, big, tail, big, big)
+
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.fillPath(path, QColor('#2b5278' if msg.is_sent else '#3a3f44'))
+        painter.setPen(QColor('#f0f6fc' if msg.is_sent else '#d1d5db'))
+        painter.setFont(option.font)
+        painter.drawText(bubble.adjusted(self.PAD_H, self.PAD_V, -self.PAD_H, -self.PAD_V),
+                         Qt.TextWordWrap, msg.text)
+        painter.restore()
+
+    @staticmethod
+    def _bubble_path(r, tl, tr, br, bl):
+        path = QPainterPath()
+        path.moveTo(r.left() + tl, r.top())
+        path.lineTo(r.right() - tr, r.top())
+        path.arcTo(r.right() - 2 * tr, r.top(), 2 * tr, 2 * tr, 90, -90)
+        path.lineTo(r.right(), r.bottom() - br)
+        path.arcTo(r.right() - 2 * br, r.bottom() - 2 * br, 2 * br, 2 * br, 0, -90)
+        path.lineTo(r.left() + bl, r.bottom())
+        path.arcTo(r.left(), r.bottom() - 2 * bl, 2 * bl, 2 * bl, 270, -90)
+        path.lineTo(r.left(), r.top() + tl)
+        path.arcTo(r.left(), r.top(), 2 * tl, 2 * tl, 180, -90)
+        path.closeSubpath()
+        return path
 
 
 class AddContactDialog(QDialog):
@@ -127,13 +981,16 @@ class AddContactDialog(QDialog):
 class ModernChatWindow(QMainWindow):
     def __init__(self):
         super().__init__()
-        self.setWindowTitle("Chat – John")
+        self.setWindowTitle(f"Chat – {CHAT_USER}")
         self.resize(960, 640)
         self.setMinimumSize(760, 520)
 
         self.contacts = []
-        self.messages = {}  # contact_name → list of Message objects
+        self.summaries = {}  # contact_name → (message count, last message text)
+        self.messages = OrderedDict()  # contact_name → Conversation, LRU of opened conversations
+        self.current_contact = None
 
+        self.store = MessageStore(DB_FILE)
         self.load_data()
 
         # UI setup (mostly same as before, only changed parts shown below)
@@ -152,7 +1009,7 @@ class ModernChatWindow(QMainWindow):
         sidebar_layout.setSpacing(12)
 
         header = QHBoxLayout()
-        name_lbl = QLabel("John")
+        name_lbl = QLabel(CHAT_USER)
         name_lbl.setStyleSheet("font-size: 19px; font-weight: bold; color: #e6edf3;")
         add_btn = QPushButton("+")
         add_btn.setFixedSize(36, 36)
@@ -188,14 +1045,32 @@ class ModernChatWindow(QMainWindow):
         search_lay.addWidget(self.search_edit)
         sidebar_layout.addWidget(search_frame)
 
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.run_search)
+
+        # The search index is built in small chunks while the window is idle
+        self.index_timer = QTimer(self)
+        self.index_timer.setInterval(INDEX_INTERVAL_MS)
+        self.index_timer.timeout.connect(self.index_more_contacts)
+
         # Contacts list
-        self.contact_list = QListWidget()
-        self.contact_list.setStyleSheet("""
-            QListWidget {background: transparent; border: none;}
-            QListWidget::item {padding: 11px 14px; border-radius: 8px; color: #c9d1d9; background: #161b22; margin: 1px 0;}
-            QListWidget::item:selected {background: #1f6feb; color: white;}
-            QListWidget::item:hover:!selected {background: #21262d;}
-        """)
+        self.contact_model = ContactListModel(self.contacts, self.summaries, self)
+        self.contact_proxy = ContactFilterProxy(self.contact_model, self)
+        self.contact_index = ContactSearchIndex()
+
+        self.contact_list = QListView()
+        self.contact_list.setModel(self.contact_proxy)
+        self.contact_list.setItemDelegate(ContactDelegate(self.contact_list))
+        self.contact_list.setUniformItemSizes(True)
+        self.contact_list.setResizeMode(QListView.Adjust)
+        self.contact_list.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        # QListView visits every row on reset; batching spreads that over several frames
+        self.contact_list.setLayoutMode(QListView.Batched)
+        self.contact_list.setBatchSize(500)
+        self.contact_list.setMouseTracking(True)
+        self.contact_list.setStyleSheet("QListView {background: transparent; border: none;}")
         self.contact_list.setSpacing(2)
         sidebar_layout.addWidget(self.contact_list, 1)
 
@@ -213,18 +1088,20 @@ class ModernChatWindow(QMainWindow):
         self.placeholder_label.setStyleSheet("color: #6e7681; font-size: 17px;")
         self.chat_layout.addWidget(self.placeholder_label, 1)
 
-        self.messages_scroll = QScrollArea()
-        self.messages_scroll.setWidgetResizable(True)
-        self.messages_scroll.setVisible(False)
-        self.messages_scroll.setStyleSheet("QScrollArea {border: none;}")
-
-        self.messages_container = QWidget()
-        self.messages_layout = QVBoxLayout(self.messages_container)
-        self.messages_layout.setContentsMargins(12, 20, 12, 20)
-        self.messages_layout.setSpacing(6)
-        self.messages_layout.addStretch()
-        self.messages_scroll.setWidget(self.messages_container)
-        self.chat_layout.addWidget(self.messages_scroll, 1)
+        self.message_model = MessageListModel(self.store, self)
+        self.message_view = QListView()
+        self.message_view.setModel(self.message_model)
+        self.message_view.setItemDelegate(MessageDelegate(self.message_view))
+        self.message_view.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.message_view.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.message_view.setSelectionMode(QAbstractItemView.NoSelection)
+        self.message_view.setFocusPolicy(Qt.NoFocus)
+        self.message_view.setResizeMode(QListView.Adjust)
+        self.message_view.setSpacing(3)
+        self.message_view.setVisible(False)
+        self.message_view.setStyleSheet("QListView {border: none; background: transparent; padding: 14px 12px;}")
+        self.message_view.verticalScrollBar().valueChanged.connect(self.on_messages_scrolled)
+        self.chat_layout.addWidget(self.message_view, 1)
 
         self.input_frame = QFrame()
         self.input_frame.setVisible(False)
@@ -250,10 +1127,117 @@ class ModernChatWindow(QMainWindow):
         main_layout.addWidget(sidebar)
         main_layout.addWidget(self.chat_frame, 1)
 
-        self.contact_list.currentItemChanged.connect(self.on_contact_selected)
+        self.contact_list.selectionModel().currentChanged.connect(self.on_contact_selected)
         self.message_input.textChanged.connect(self.adjust_input_height)
 
-        self.current_contact = None
+        self.transport = None
+        if SERVER_URL:
+            self.start_transport()
+
+    def start_transport(self):
+        if ROOM_CONTACT not in self.contacts:
+            self.contacts.insert(0, ROOM_CONTACT)
+            self.store.add_contact(ROOM_CONTACT, first=True)
+            self.populate_contacts()
+        self.room_ids = set()  # ids received this session; older ones are looked up in the store
+        self.unacked = deque()  # our room messages, in send order, waiting for their msg_id
+        last_seen = self.store.last_msg_id(ROOM_CONTACT)
+
+        self.transport = ChatTransport(SERVER_URL, CHAT_USER, CHAT_PASS, last_seen)
+        self.transport.messages_pending.connect(self.schedule_incoming)
+        self.transport.status_changed.connect(self.statusBar().showMessage)
+        self.transport.start()
+
+    def schedule_incoming(self):
+        QTimer.singleShot(FRAME_INTERVAL_MS, self.apply_incoming)
+
+    def apply_incoming(self):
+        batch = self.transport.take_batch(MAX_BATCH_PER_FRAME)
+        if self.transport.incoming:
+            self.schedule_incoming()
+        if not batch:
+            return
+
+        room = self.messages.get(ROOM_CONTACT)  # None unless the room is in the cache
+        new_msgs = []
+        reload_view = False
+        for payload in batch:
+            kind = payload.get("type")
+            if kind in ("message", "ack"):
+                msg_id = payload.get("msg_id")
+                if not msg_id or msg_id in self.room_ids or self.store.has_msg_id(msg_id):
+                    continue
+                self.room_ids.add(msg_id)
+                content = payload.get("content", "")
+                own = payload.get("username") == CHAT_USER
+                if own and self.ack_sent(content, msg_id):
+                    continue
+                # Anything else of ours was sent from another session
+                text = content if own else f"{payload.get('username')}: {content}"
+                new_msgs.append(Message(text, own, payload.get("timestamp"), msg_id))
+            elif kind in ("delete", "clear_all"):
+                self.store.append_messages(ROOM_CONTACT, new_msgs)
+                if room is not None:
+                    room.messages.extend(new_msgs)
+                new_msgs = []
+                if kind == "delete":
+                    prefix = payload.get("msg_id", "")
+                    self.store.delete_messages(ROOM_CONTACT, prefix)
+                    if room is not None:
+                        room.messages[:] = [m for m in room.messages if not (m.msg_id or "").startswith(prefix)]
+                else:
+                    self.store.clear_messages(ROOM_CONTACT)
+                    self.room_ids.clear()
+                    if room is not None:
+                        room.messages.clear()
+                        room.first_id, room.complete = None, True
+                reload_view = True
+            elif kind == "system":
+                self.statusBar().showMessage(payload.get("content", ""))
+
+        if not new_msgs and not reload_view:
+            return
+
+        self.store.append_messages(ROOM_CONTACT, new_msgs)
+        follow = self.current_contact == ROOM_CONTACT and self.at_bottom()
+        if self.current_contact == ROOM_CONTACT and not reload_view:
+            self.message_model.append_messages(new_msgs, follow)
+        elif room is not None:
+            room.messages.extend(new_msgs)
+
+        if reload_view:
+            self.flush_store()
+            self.summaries[ROOM_CONTACT] = self.store.load_summary(ROOM_CONTACT)
+        else:
+            self.note_new_messages(ROOM_CONTACT, new_msgs)
+
+        if self.current_contact == ROOM_CONTACT and reload_view:
+            self.load_messages_for_current()
+            self.scroll_to_bottom()
+        elif follow:
+            self.scroll_to_bottom()
+
+    def ack_sent(self, text, msg_id):
+        """Give the stored copy of a message we sent its server id; False if there is none."""
+        for i, msg in enumerate(self.unacked):
+            if msg.text == text:
+                # The server answers in order, so anything sent before it won't be acked
+                for _ in range(i + 1):
+                    self.unacked.popleft()
+                msg.msg_id = msg_id
+                self.store.set_msg_id(ROOM_CONTACT, text, msg_id)
+                return True
+        return False
+
+    def closeEvent(self, event):
+        self.index_timer.stop()
+        self.search_timer.stop()
+        if self.transport:
+            self.transport.stop()
+        error = self.store.close()
+        if error:
+            print(f"Could not save messages: {error}", file=sys.stderr)
+        super().closeEvent(event)
 
     def adjust_input_height(self):
         doc_h = self.message_input.document().size().height()
@@ -261,65 +1245,128 @@ class ModernChatWindow(QMainWindow):
         self.message_input.setFixedHeight(new_h)
 
     def populate_contacts(self):
-        self.contact_list.clear()
-        for name in self.contacts:
-            item = ContactItem(name)
-            self.contact_list.addItem(item)
+        self.contact_index = ContactSearchIndex()
+        self.index_timer.start(INDEX_START_DELAY_MS)  # let the contact list lay out first
+        self.contact_model.reset()
+        self.run_search()
+
+    def index_more_contacts(self, budget_ms=INDEX_TICK_MS):
+        self.index_timer.setInterval(INDEX_INTERVAL_MS)
+        index, contacts = self.contact_index, self.contacts
+        deadline = time.perf_counter() + budget_ms / 1000
+        while len(index) < len(contacts) and time.perf_counter() < deadline:
+            index.add(contacts[len(index)])
+        if len(index) >= len(contacts):
+            self.index_timer.stop()
 
     def on_search_changed(self, text):
-        text = text.strip()
-        if text:
-            for i in range(self.contact_list.count()):
-                item = self.contact_list.item(i)
-                if isinstance(item, ContactItem):
-                    item.set_highlight(text)
-        else:
-            self.populate_contacts()
+        self.search_timer.start()  # restarts on every keystroke
+
+    def run_search(self):
+        self.search_timer.stop()
+        query = self.search_edit.text().strip()
+        # Contacts the idle build hasn't reached yet are scanned directly
+        rows = self.contact_index.search(query, self.contacts[len(self.contact_index):]) if query else None
+
+        # A model reset drops the current index without signals; put it back quietly
+        selection = self.contact_list.selectionModel()
+        selection.blockSignals(True)
+        self.contact_proxy.set_filter(query, rows)
+        if self.current_contact in self.contacts:
+            source = self.contact_model.index(self.contacts.index(self.current_contact), 0)
+            self.contact_list.setCurrentIndex(self.contact_proxy.mapFromSource(source))
+        selection.blockSignals(False)
 
     def on_contact_selected(self, current, previous):
-        if not current:
+        if not current.isValid():
             self.current_contact = None
             self.placeholder_label.setVisible(True)
-            self.messages_scroll.setVisible(False)
+            self.message_view.setVisible(False)
             self.input_frame.setVisible(False)
             self.clear_messages()
             return
 
-        self.current_contact = current.original_name
+        self.current_contact = current.data(Qt.DisplayRole)
         self.placeholder_label.setVisible(False)
-        self.messages_scroll.setVisible(True)
+        self.message_view.setVisible(True)
         self.input_frame.setVisible(True)
-        self.clear_messages()
         self.load_messages_for_current()
         self.scroll_to_bottom()
 
     def load_messages_for_current(self):
-        if not self.current_contact or self.current_contact not in self.messages:
+        if not self.current_contact:
+            return
+        self.message_model.set_conversation(self.conversation(self.current_contact))
+
+    def conversation(self, contact):
+        """Conversation of ``contact``, starting with its newest page, kept in an LRU."""
+        conv = self.messages.get(contact)
+        if conv is not None:
+            self.messages.move_to_end(contact)
+            return conv
+
+        self.flush_store()  # pick up writes still waiting in the queue
+        msgs, first_id = self.store.load_messages(contact)
+        conv = Conversation(contact, msgs, first_id, complete=len(msgs) < MESSAGE_PAGE_SIZE)
+        self.messages[contact] = conv
+        while len(self.messages) > MAX_CACHED_CONVERSATIONS:
+            self.messages.popitem(last=False)
+        return conv
+
+    def note_new_messages(self, contact, msgs):
+        if msgs:
+            count, _ = self.summaries.get(contact, (0, ""))
+            self.summaries[contact] = (count + len(msgs), msgs[-1].text)
+
+    def at_bottom(self):
+        vsb = self.message_view.verticalScrollBar()
+        return self.message_model.at_end() and vsb.maximum() - vsb.value() <= NEAR_BOTTOM_PX
+
+    def on_messages_scrolled(self, value):
+        vsb = self.message_view.verticalScrollBar()
+        model = self.message_model
+        if vsb.maximum() == 0:
             return
-        for msg in self.messages[self.current_contact]:
-            widget = MessageWidget(msg)
-            self.messages_layout.insertWidget(self.messages_layout.count()-1, widget)
+        if value == vsb.minimum() and model.has_older():
+            # Keep the message that was at the top in place while older ones are prepended
+            loaded = model.load_older()
+            self.message_view.scrollTo(model.index(loaded, 0), QAbstractItemView.PositionAtTop)
+        elif value == vsb.maximum() and not model.at_end():
+            # Same at the bottom, for the rows dropped while reading older history
+            last = model.rowCount() - 1
+            _, dropped = model.load_newer()
+            self.message_view.scrollTo(model.index(last - dropped, 0), QAbstractItemView.PositionAtBottom)
 
     def add_message(self, text, is_sent=True):
         if not self.current_contact:
             return
         msg = Message(text, is_sent)
-        if self.current_contact not in self.messages:
-            self.messages[self.current_contact] = []
-        self.messages[self.current_contact].append(msg)
-
-        widget = MessageWidget(msg)
-        self.messages_layout.insertWidget(self.messages_layout.count()-1, widget)
-        self.save_messages()
+        # The model holds self.messages[self.current_contact], so this stores it too
+        self.message_model.show_latest()
+        self.message_model.append_messages([msg])
+        self.store.append_messages(self.current_contact, [msg])
+        self.note_new_messages(self.current_contact, [msg])
+        return msg
 
     def send_message(self):
         text = self.message_input.toPlainText().strip()
         if not text or not self.current_contact:
             return
-        self.add_message(text, True)
+        if self.transport and self.current_contact == ROOM_CONTACT and ChatTransport.is_command(text):
+            # Never stored or shown as a message; the server's reply lands in the status bar
+            self.message_input.clear()
+            self.transport.send(text)
+            self.statusBar().showMessage(text.split()[0] if text.startswith("/") else "AUTH ADMIN …")
+            return
+        msg = self.add_message(text, True)
         self.message_input.clear()
         self.scroll_to_bottom()
 
+        if self.transport and self.current_contact == ROOM_CONTACT:
+            self.unacked.append(msg)
+            self.transport.send(text)
+            return
+
         # Demo reply
         if text.lower().startswith(("hi", "hey", "hello")):
             reply = "Hey! How's it going? 😄"
@@ -327,14 +1374,10 @@ class ModernChatWindow(QMainWindow):
             self.scroll_to_bottom()
 
     def clear_messages(self):
-        while self.messages_layout.count() > 1:
-            w = self.messages_layout.takeAt(0).widget()
-            if w:
-                w.deleteLater()
+        self.message_model.set_conversation(Conversation())
 
     def scroll_to_bottom(self):
-        vsb = self.messages_scroll.verticalScrollBar()
-        vsb.setValue(vsb.maximum())
+        self.message_view.scrollToBottom()
 
     def open_add_contact(self):
         dialog = AddContactDialog(self)
@@ -352,41 +1395,59 @@ class ModernChatWindow(QMainWindow):
             if name in self.contacts:
                 box.information(self, "Info", "Contact already exists.")
                 return
-            self.contacts.append(name)
-            self.messages[name] = []
-            self.save_contacts()
-            self.populate_contacts()
+            self.contact_model.append(name)
+            self.index_timer.start()
+            self.store.add_contact(name)
+            if self.search_edit.text().strip():
+                self.run_search()
             box.information(self, "Success", f"Added contact: {name}")
 
     def load_data(self):
+        if self.store.is_empty():
+            self.import_json_files()
+        # Only the contact index is read here; conversations load in on_contact_selected
+        for name, count, last_text in self.store.load_summaries():
+            self.contacts.append(name)
+            self.summaries[name] = (count, last_text)
+
+    def import_json_files(self):
+        """One-time migration of the old contacts.json / messages.json files.
+
+        Entries that aren't well-formed are skipped. The import is a single
+        store op, so if it fails the store stays empty and it runs again on
+        the next start.
+        """
+        data = {}
         if os.path.exists(CONTACTS_FILE):
             try:
                 with open(CONTACTS_FILE, "r", encoding="utf-8") as f:
                     data = json.load(f)
-                    self.contacts = data.get("contacts", [])
-            except:
-                self.contacts = []
+            except (OSError, ValueError):
+                data = {}
+        contacts = data.get("contacts", []) if isinstance(data, dict) else []
+        contacts = [name for name in contacts if isinstance(name, str)] if isinstance(contacts, list) else []
 
+        raw = {}
         if os.path.exists(MESSAGES_FILE):
             try:
                 with open(MESSAGES_FILE, "r", encoding="utf-8") as f:
                     raw = json.load(f)
-                    for contact, msgs in raw.items():
-                        self.messages[contact] = [Message(m["text"], m["is_sent"], m.get("timestamp")) for m in msgs]
-            except:
-                self.messages = {}
-
-    def save_contacts(self):
-        data = {"contacts": self.contacts}
-        with open(CONTACTS_FILE, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-
-    def save_messages(self):
-        serializable = {}
-        for contact, msgs in self.messages.items():
-            serializable[contact] = [{"text": m.text, "is_sent": m.is_sent, "timestamp": m.timestamp} for m in msgs]
-        with open(MESSAGES_FILE, "w", encoding="utf-8") as f:
-            json.dump(serializable, f, indent=2, ensure_ascii=False)
+            except (OSError, ValueError):
+                raw = {}
+        conversations = {}
+        for contact, msgs in (raw.items() if isinstance(raw, dict) else ()):
+            conversations[contact] = [Message(m["text"], bool(m.get("is_sent")), m.get("timestamp"), m.get("msg_id"))
+                                      for m in (msgs if isinstance(msgs, list) else ())
+                                      if isinstance(m, dict) and isinstance(m.get("text"), str)]
+
+        if contacts or conversations:
+            self.store.import_legacy(contacts, conversations)
+            self.flush_store()
+
+    def flush_store(self):
+        error = self.store.flush()
+        if error:
+            self.statusBar().showMessage(f"Could not save messages: {error}")
 
 
 def main():
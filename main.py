@@ -24,6 +24,7 @@ BANNER = TEXT_BANNER + r"""
                 WebSocket Chat Server (aiohttp)
 ──────────────────────────────────────────────────────────
 • Basic Auth required (username + CHAT_PASS)
+• ?since=<msg_id> to resume history after a reconnect
 • AUTH ADMIN <password> to become admin
 • /users
 • /delete <msg_id>     (admin)
@@ -92,6 +93,11 @@ def chat_msg(username, content, msg_id):
     }
 
 
+def ack_msg(payload):
+    # The sender's own copy of a chat message, so it learns the msg_id
+    return json.dumps({**payload, "type": "ack"})
+
+
 def delete_announcement(msg_id):
     return json.dumps({
         "type": "delete",
@@ -187,6 +193,13 @@ Authentication:
 You need to send Basic Auth in the connection headers:
     Authorization: Basic <base64("username:YOUR_CHAT_PASS")>
 
+Reconnecting:
+    wss://YOUR-DOMAIN.onrender.com/?since=<last msg_id>
+    only replays the history after that message
+
+Your own messages are not echoed back; each one is confirmed with
+    {"type": "ack", "msg_id": ..., ...}   ← same fields as a message
+
 Commands (after connecting):
     /users
     AUTH ADMIN <admin-password>     ← become admin
@@ -241,8 +254,16 @@ async def websocket_handler(request):
     await ws.send_str(system_msg(f"Welcome, {username}!"))
     await broadcast(system_msg(f"{username} joined the chat"))
 
-    # Send history
-    for msg in message_history:
+    # Send history (only what the client hasn't seen when it resumes with ?since=<msg_id>)
+    history = message_history
+    since = request.query.get("since")
+    if since:
+        for i, m in enumerate(message_history):
+            if m.get("msg_id") == since:
+                history = message_history[i + 1:]
+                break
+
+    for msg in history:
         await ws.send_json(msg)
 
     try:
@@ -315,6 +336,7 @@ async def websocket_handler(request):
             payload = chat_msg(username, text, msg_id)
 
             message_history.append(payload)
+            await ws.send_str(ack_msg(payload))
             await broadcast(json.dumps(payload), exclude=ws)
 
     except Exception as e:
@@ -0,0 +1,26 @@
+import os
+import importlib.util
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ.pop("CHAT_SERVER_URL", None)  # tests never connect to a real server
+
+pytest.importorskip("PyQt5")
+pytest.importorskip("aiohttp")
+
+CLIENT_PATH = os.path.join(os.path.dirname(__file__), os.pardir, "GUI", "client app.py")
+
+
+@pytest.fixture(scope="session")
+def client():
+    spec = importlib.util.spec_from_file_location("client_app", CLIENT_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope="session")
+def qapp(client):
+    from PyQt5.QtWidgets import QApplication
+    return QApplication.instance() or QApplication([])
@@ -0,0 +1,91 @@
+"""ContactSearchIndex.search against a brute-force scan of the names."""
+
+import random
+
+
+def brute_force(names, query):
+    """Exact matches ranked prefix, word start, substring; rows ascending within each."""
+    q = query.lower()
+    word_start = " " + q.replace(".", " ").replace("_", " ").replace("-", " ")
+    lows = [name.lower() for name in names]
+    words = [" " + low.replace(".", " ").replace("_", " ").replace("-", " ") for low in lows]
+    exact = [row for row, low in enumerate(lows) if q in low]
+    at_word = [row for row in exact if word_start in words[row]]
+    prefix = [row for row in at_word if lows[row].startswith(q)]
+    return (prefix
+            + [row for row in at_word if row not in prefix]
+            + [row for row in exact if row not in at_word])
+
+
+def check(index, names, query):
+    expected = brute_force(names, query)
+    ranked = index.search(query)
+    assert ranked[:len(expected)] == expected, query
+    assert len(set(ranked)) == len(ranked), query  # fuzzy rows never repeat exact ones
+
+
+def random_names(rng, count):
+    letters = "abcdelmnor"
+    names = []
+    for _ in range(count):
+        parts = ["".join(rng.choice(letters) for _ in range(rng.randint(1, 5)))
+                 for _ in range(rng.randint(1, 3))]
+        name = parts[0]
+        for part in parts[1:]:
+            name += rng.choice(" .-_") + part
+        names.append(name.title() if rng.random() < 0.5 else name)
+    return names
+
+
+def test_space_in_short_query_is_not_listed_twice(client):
+    names = ["A Bell", "Abe Lincoln", "Bob"]
+    index = client.ContactSearchIndex(names)
+    assert index.search("a b") == [0]
+
+
+def test_separator_query_ranks_as_word_start(client):
+    names = ["Anna-Mary Jones", "Mary-Jane Doe", "Rosemary-Jo", "Jo Mary-Jo"]
+    index = client.ContactSearchIndex(names)
+    assert index.search("mary-j")[:3] == [1, 3, 2]
+    assert index.search("mary-jane")[:1] == [1]
+
+
+def test_matches_brute_force(client):
+    rng = random.Random(7)
+    names = random_names(rng, 2000)
+    index = client.ContactSearchIndex(names)
+    for _ in range(3000):
+        name = rng.choice(names)
+        start = rng.randrange(len(name))
+        query = name[start:start + rng.randint(1, 8)]
+        if rng.random() < 0.2:
+            query = "".join(rng.choice("abe -._") for _ in range(rng.randint(1, 5)))
+        check(index, names, query)
+
+
+def test_typing_matches_brute_force(client):
+    # Each keystroke may narrow the previous result instead of the postings
+    rng = random.Random(11)
+    names = random_names(rng, 2000)
+    index = client.ContactSearchIndex(names)
+    for _ in range(300):
+        name = rng.choice(names)
+        start = rng.randrange(len(name))
+        query = name[start:start + rng.randint(4, 10)]
+        for end in range(1, len(query) + 1):
+            check(index, names, query[:end])
+
+
+def test_partial_index_scans_pending_names(client):
+    # Searching before the idle build finishes ranks the unindexed tail alongside
+    rng = random.Random(13)
+    names = random_names(rng, 2000)
+    index = client.ContactSearchIndex(names[:700])
+    for _ in range(500):
+        name = rng.choice(names)
+        start = rng.randrange(len(name))
+        query = name[start:start + rng.randint(1, 8)]
+        expected = brute_force(names, query)
+        ranked = index.search(query, names[700:])
+        assert ranked[:len(expected)] == expected, query
+        assert len(set(ranked)) == len(ranked), query
@@ -0,0 +1,113 @@
+"""MessageStore: batched writes, paging, and what flush() reports when writes fail."""
+
+import sqlite3
+
+import pytest
+
+
+@pytest.fixture
+def store(client, tmp_path):
+    store = client.MessageStore(str(tmp_path / "chat.db"))
+    yield store
+    store.close()
+
+
+def texts(store, contact):
+    return [text for (text,) in store.db.execute("SELECT text FROM messages WHERE contact = ? ORDER BY id",
+                                                 (contact,))]
+
+
+def test_flush_commits_queued_writes(client, store):
+    store.add_contact("Ann")
+    store.append_messages("Ann", [client.Message("hi", True), client.Message("yo", False)])
+    assert store.flush() is None
+    assert texts(store, "Ann") == ["hi", "yo"]
+    assert store.load_summary("Ann") == (2, "yo")
+
+
+def test_load_messages_pages_back_by_row_id(client, store):
+    store.add_contact("Ann")
+    store.append_messages("Ann", [client.Message(str(i), True) for i in range(5)])
+    store.flush()
+    page, first_id = store.load_messages("Ann", limit=2)
+    assert [m.text for m in page] == ["3", "4"]
+    page, first_id = store.load_messages("Ann", before=first_id, limit=2)
+    assert [m.text for m in page] == ["1", "2"]
+    page, first_id = store.load_messages("Ann", before=first_id, limit=2)
+    assert [m.text for m in page] == ["0"]
+
+
+def test_failing_op_only_drops_itself(client, store, monkeypatch):
+    apply = client.MessageStore._apply
+
+    def failing(db, op):
+        if op[0] == "append" and op[2][0][0] == "boom":
+            db.execute("INSERT INTO messages (contact, text, is_sent) VALUES ('Ann', 'half-done', 1)")
+            raise sqlite3.IntegrityError("boom")
+        return apply(db, op)
+
+    monkeypatch.setattr(client.MessageStore, "_apply", staticmethod(failing))
+    store.add_contact("Ann")
+    for text in ("ok1", "boom", "ok2"):
+        store.append_messages("Ann", [client.Message(text, True)])
+    assert isinstance(store.flush(), sqlite3.IntegrityError)
+    assert texts(store, "Ann") == ["ok1", "ok2"]
+    assert store.load_summary("Ann") == (2, "ok2")
+
+    # The writer is still alive and the error was reported once
+    store.append_messages("Ann", [client.Message("ok3", True)])
+    assert store.flush() is None
+    assert texts(store, "Ann")[-1] == "ok3"
+
+
+def test_locked_batch_is_retried(client, store, monkeypatch):
+    apply = client.MessageStore._apply
+    failures = []
+
+    def locked_once(db, op):
+        if not failures:
+            failures.append(op)
+            raise sqlite3.OperationalError("database is locked")
+        return apply(db, op)
+
+    monkeypatch.setattr(client.MessageStore, "_apply", staticmethod(locked_once))
+    store.add_contact("Ann")
+    store.append_messages("Ann", [client.Message("hi", True)])
+    assert store.flush() is None
+    assert texts(store, "Ann") == ["hi"]
+
+
+def test_flush_gives_up_after_timeout(client, store, monkeypatch):
+    apply = client.MessageStore._apply
+
+    def slow(db, op):
+        import time
+        time.sleep(0.5)
+        return apply(db, op)
+
+    monkeypatch.setattr(client.MessageStore, "_apply", staticmethod(slow))
+    store.add_contact("Ann")
+    assert isinstance(store.flush(timeout=0.05), TimeoutError)
+    assert store.flush() is None
+    assert store.load_summary("Ann") == (0, "")
+
+
+def test_set_msg_id_marks_newest_matching_row(client, store):
+    store.add_contact("Room")
+    store.append_messages("Room", [client.Message("hi", True), client.Message("hi", True),
+                                   client.Message("hi", False)])
+    store.set_msg_id("Room", "hi", "abcd1234")
+    store.flush()
+    rows = store.db.execute("SELECT is_sent, msg_id FROM messages ORDER BY id").fetchall()
+    assert rows == [(1, None), (1, "abcd1234"), (0, None)]
+    assert store.has_msg_id("abcd1234")
+
+
+def test_import_lands_whole_or_not_at_all(client, store):
+    store.import_legacy(["Ann", "Bob"], {"Ann": [client.Message("hi", True)], "Nobody": []})
+    assert store.flush() is None
+    assert [name for name, _, _ in store.load_summaries()] == ["Ann", "Bob"]
+
+    store.import_legacy(["Cy"], {"Cy": [client.Message(None, True)]})  # text is NOT NULL
+    assert store.flush() is not None
+    assert [name for name, _, _ in store.load_summaries()] == ["Ann", "Bob"]
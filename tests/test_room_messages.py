@@ -0,0 +1,98 @@
+"""Chat Room messages: acks for what we send, and deduplication of replays by msg_id."""
+
+import pytest
+
+
+@pytest.fixture
+def window(client, qapp, tmp_path, monkeypatch):
+    class FakeTransport(client.ChatTransport):
+        """Collects sent lines; tests feed incoming payloads directly."""
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.sent = []
+
+        def start(self):
+            pass
+
+        def stop(self):
+            pass
+
+        def send(self, text):
+            self.sent.append(text)
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(client, "SERVER_URL", "ws://chat.invalid/")
+    monkeypatch.setattr(client, "ChatTransport", FakeTransport)
+    window = client.ModernChatWindow()
+    window.contact_list.setCurrentIndex(window.contact_proxy.index(0, 0))
+    assert window.current_contact == client.ROOM_CONTACT
+    yield window
+    window.close()
+
+
+def receive(window, *payloads):
+    window.transport.incoming.extend(payloads)
+    window.apply_incoming()
+    window.flush_store()
+
+
+def message(client, msg_id, text, username=None, kind="message"):
+    return {"type": kind, "msg_id": msg_id, "username": username or client.CHAT_USER, "content": text}
+
+
+def stored(window, client):
+    return window.store.db.execute("SELECT text, is_sent, msg_id FROM messages WHERE contact = ? ORDER BY id",
+                                   (client.ROOM_CONTACT,)).fetchall()
+
+
+def send(window, text):
+    window.message_input.setPlainText(text)
+    window.send_message()
+
+
+def test_ack_gives_sent_message_its_id(client, window):
+    send(window, "hello")
+    assert window.transport.sent == ["hello"]
+    receive(window, message(client, "aaaa1111", "hello", kind="ack"))
+    assert stored(window, client) == [("hello", 1, "aaaa1111")]
+    assert not window.unacked
+
+
+def test_replay_of_known_id_is_dropped(client, window):
+    send(window, "hello")
+    receive(window, message(client, "aaaa1111", "hello", kind="ack"))
+    receive(window, message(client, "aaaa1111", "hello"), message(client, "bbbb2222", "hi", username="Ann"))
+    receive(window, message(client, "bbbb2222", "hi", username="Ann"))
+    assert stored(window, client) == [("hello", 1, "aaaa1111"), ("Ann: hi", 0, "bbbb2222")]
+
+
+def test_own_message_from_another_session_is_kept(client, window):
+    receive(window, message(client, "cccc3333", "sent elsewhere"))
+    assert stored(window, client) == [("sent elsewhere", 1, "cccc3333")]
+
+
+def test_unmatched_acks_skip_older_unacked(client, window):
+    send(window, "lost")
+    send(window, "kept")
+    receive(window, message(client, "dddd4444", "kept", kind="ack"))
+    assert stored(window, client) == [("lost", 1, None), ("kept", 1, "dddd4444")]
+    assert not window.unacked
+
+
+def test_delete_reaches_own_acked_message(client, window):
+    send(window, "oops")
+    receive(window, message(client, "eeee5555", "oops", kind="ack"))
+    receive(window, {"type": "delete", "msg_id": "eeee"})
+    assert stored(window, client) == []
+    assert window.message_model.rowCount() == 0
+
+
+def test_commands_are_not_stored(client, window):
+    send(window, "/users")
+    send(window, "AUTH ADMIN secret")
+    assert window.transport.sent == ["/users", "AUTH ADMIN secret"]
+    receive(window, {"type": "system", "content": "Online: John"})
+    assert stored(window, client) == []
+    assert not window.unacked
+    assert window.statusBar().currentMessage() == "Online: John"